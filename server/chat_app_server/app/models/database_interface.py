@@ -136,6 +136,15 @@ class AbstractDatabaseAdapter(ABC):
         """批量执行"""
         pass
     
+    def execute_many_sync(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> DatabaseCursor:
+        """同步批量执行（默认逐条执行，支持批量写入的适配器可覆盖）"""
+        total_count = 0
+        for params in params_list:
+            cursor = self.execute_sync(query, params)
+            total_count += cursor.rowcount
+        
+        return DatabaseCursor(rowcount=total_count)
+    
     # 索引管理
     @abstractmethod
     async def create_index(self, table_name: str, index_name: str, fields: List[str], unique: bool = False) -> None:
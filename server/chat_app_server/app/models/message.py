@@ -106,6 +106,50 @@ class MessageCreate(BaseModel):
         
         return cls.get_by_id_sync(message_id)
 
+    @classmethod
+    def create_many_sync(cls, messages: List["MessageCreate"]) -> List[Dict[str, Any]]:
+        """批量创建消息（同步版本），一次批量写入、一次提交"""
+        if not messages:
+            return []
+        
+        query = """
+        INSERT INTO messages (id, session_id, role, content, summary, tool_calls, tool_call_id, reasoning, metadata, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """
+        
+        message_ids = []
+        params_list = []
+        for message_data in messages:
+            # 生成的ID写回消息对象：批量写入已提交但后续读取失败时，调用方按相同ID重试不会重复插入
+            if not message_data.id:
+                message_data.id = str(uuid.uuid4())
+            message_id = message_data.id
+            message_ids.append(message_id)
+            params_list.append((
+                message_id,
+                message_data.session_id,
+                message_data.role,
+                message_data.content,
+                message_data.summary,
+                message_data.tool_calls_str,
+                message_data.tool_call_id,
+                message_data.reasoning,
+                message_data.metadata_str
+            ))
+        
+        db = get_database()
+        db.execute_many_sync(query, params_list)
+        
+        # 一次查询取回全部新行，按写入顺序返回
+        placeholders = ", ".join("?" for _ in message_ids)
+        rows = db.fetchall_sync(f"SELECT * FROM messages WHERE id IN ({placeholders})", tuple(message_ids))
+        saved = {}
+        for row in rows:
+            message = row_to_dict(row)
+            if message:
+                saved[message["id"]] = message
+        return [saved.get(message_id) for message_id in message_ids]
+
     @classmethod
     def get_by_id_sync(cls, message_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取消息（同步版本）"""
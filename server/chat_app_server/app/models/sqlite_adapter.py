@@ -134,6 +134,25 @@ class SQLiteAdapter(AbstractDatabaseAdapter):
         """执行SQL语句"""
         self.log_query(query, params)
 
+        async def _operation() -> DatabaseCursor:
+            # 转换参数格式
+            if isinstance(params, dict):
+                # 将字典参数转换为命名参数格式
+                cursor = await self._connection.execute(query, params)
+            else:
+                cursor = await self._connection.execute(query, params or ())
+
+            await self._connection.commit()
+
+            return DatabaseCursor(
+                rowcount=cursor.rowcount,
+                lastrowid=str(cursor.lastrowid) if cursor.lastrowid else None
+            )
+
+        return await self._run_locked(query, _operation)
+
+    async def _run_locked(self, query: str, operation) -> DatabaseCursor:
+        """在连接锁内执行操作：写操作额外持有全局写锁，遇到 database is locked 时退避重试"""
         # 简易重试以缓解偶发的 SQLITE_BUSY（database is locked）
         attempts = 3
         for attempt in range(attempts):
@@ -154,19 +173,7 @@ class SQLiteAdapter(AbstractDatabaseAdapter):
                                 # 轻微等待后重试，避免阻塞事件循环
                                 await asyncio.sleep(0.01)
 
-                        # 转换参数格式
-                        if isinstance(params, dict):
-                            # 将字典参数转换为命名参数格式
-                            cursor = await self._connection.execute(query, params)
-                        else:
-                            cursor = await self._connection.execute(query, params or ())
-
-                        await self._connection.commit()
-
-                        return DatabaseCursor(
-                            rowcount=cursor.rowcount,
-                            lastrowid=str(cursor.lastrowid) if cursor.lastrowid else None
-                        )
+                        return await operation()
                     finally:
                         if acquired_global:
                             # 释放全局写锁
@@ -255,6 +262,20 @@ class SQLiteAdapter(AbstractDatabaseAdapter):
         # 将同步调用委派到异步 execute，从而使用同一 aiosqlite 连接与全局写锁
         return _run(self.execute(query, params))
 
+    def execute_many_sync(self, query: str, params_list: List[Union[Tuple, Dict[str, Any]]]) -> DatabaseCursor:
+        """同步批量执行（一次 executemany + 一次提交）"""
+
+        def _run(coro):
+            try:
+                loop = asyncio.get_event_loop()
+                if loop.is_running():
+                    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+                return asyncio.run(coro)
+            except RuntimeError:
+                return asyncio.run(coro)
+
+        return _run(self.execute_many(query, params_list))
+
     def _is_write_query(self, query: str) -> bool:
         """判断是否为写操作（需要全局写锁）"""
         if not query:
@@ -381,17 +402,22 @@ class SQLiteAdapter(AbstractDatabaseAdapter):
         """批量执行"""
         self.log_query(query, f"批量执行 {len(params_list)} 条记录")
         
-        async with self._lock:
-            if not self._connection:
-                await self.init_database()
-            
-            cursor = await self._connection.executemany(query, params_list)
-            await self._connection.commit()
+        async def _operation() -> DatabaseCursor:
+            try:
+                cursor = await self._connection.executemany(query, params_list)
+                await self._connection.commit()
+            except Exception:
+                # 批量失败时回滚已执行的部分，避免残留写入被后续提交
+                await self._connection.rollback()
+                raise
             
             return DatabaseCursor(
                 rowcount=cursor.rowcount,
                 lastrowid=str(cursor.lastrowid) if cursor.lastrowid else None
             )
+        
+        # 与 execute 共用全局写锁与重试逻辑
+        return await self._run_locked(query, _operation)
     
     async def create_index(self, table_name: str, index_name: str, fields: List[str], unique: bool = False) -> None:
         """创建索引"""
@@ -168,7 +168,7 @@ class AiRequestHandler:
             response = self.openai_client.chat.completions.create(**request_params)
             
             # 收集流式响应数据
-            collected_content = ""
+            content_parts = []
             collected_tool_calls = []
             response_id = None
             model = None
@@ -195,7 +195,7 @@ class AiRequestHandler:
                     
                     # 处理内容
                     if delta.content:
-                        collected_content += delta.content
+                        content_parts.append(delta.content)
                         # 调用流式回调
                         on_chunk(delta.content)
                     
@@ -218,6 +218,9 @@ class AiRequestHandler:
                                 if tool_call.function.arguments:
                                     collected_tool_calls[tool_call.index]["function"]["arguments"] += tool_call.function.arguments
             
+            # 分片统一拼接，避免逐块字符串拼接
+            collected_content = "".join(content_parts)
+
             # 构建最终响应
             response_data = {
                 "id": response_id,
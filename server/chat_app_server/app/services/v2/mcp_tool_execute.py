@@ -10,32 +10,114 @@ MCP工具执行器（mcp-python / fastmcp）
 
 import json
 import asyncio
+import atexit
+import hashlib
+import logging
 import os
 import shlex
-from typing import Dict, List, Any, Optional, Callable
-
+import ssl
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Callable, Mapping
+
+import httpx
 from fastmcp import Client
+from fastmcp.client.transports import SSETransport, StreamableHttpTransport, infer_transport
+from fastmcp.exceptions import ToolError
+
+from ...utils.config_reader import get_config_dir
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 工具参数等 JSON 解析：优先使用 orjson（其 JSONDecodeError 是 json.JSONDecodeError 的子类）
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+_JSONDecodeError = json.JSONDecodeError
+
+
+def _json_dumps(obj: Any, sort_keys: bool = False) -> str:
+    """JSON 序列化：优先 orjson（紧凑输出），orjson 不支持的值回退到标准库；无法序列化的对象转为 str。"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=option).decode("utf-8")
+        except TypeError:
+            # 如超出 64 位的整数
+            pass
+    return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, default=str)
+
+logger = logging.getLogger(__name__)
+
+# 工具结果中的固定错误文案
+_UNKNOWN_NAME = "unknown"
+_ERR_EMPTY_NAME = "工具名称不能为空"
+_ERR_PARSE_PREFIX = "参数解析失败: "
+_ERR_EXEC_PREFIX = "工具执行失败: "
+
+# 单次工具调用的超时（秒）：调用并发进行，超时只影响该调用本身，不会阻塞同一服务器的其他调用
+_CALL_TOOL_TIMEOUT = float(os.environ.get("MCP_TOOL_CALL_TIMEOUT", "300"))
+
+# 连接池中客户端的空闲回收时间与检查间隔（秒）：长期未用的连接（含配置已变更、不再使用的 STDIO 子进程）被关闭
+_POOL_IDLE_TIMEOUT = float(os.environ.get("MCP_CLIENT_IDLE_TIMEOUT", "600"))
+_POOL_SWEEP_INTERVAL = 60.0
+
+# 工具列表磁盘缓存的有效期（秒），过期后重新从服务器获取，避免服务器升级后长期使用旧定义
+_TOOLS_CACHE_TTL = 24 * 3600.0
+# 缓存内容格式版本，参与缓存文件名计算；工具定义的生成方式变化时递增，使旧缓存失效
+_TOOLS_CACHE_VERSION = 3
 
 
 def to_text(result: Any) -> str:
-    """提取 fastmcp 返回对象中的文本内容，兼容不同版本。"""
+    """提取 fastmcp 返回对象中的文本内容，兼容不同版本。返回值总是 str。"""
+    # 常见情况：CallToolResult.content 仅含一个 TextContent，直接按属性读取，省去逐项探测
+    try:
+        content = result.content
+        if len(content) == 1:
+            first = content[0]
+            if first.type == "text":
+                return first.text
+    except (AttributeError, TypeError):
+        pass
+
     text_attr = getattr(result, "text", None)
     if callable(text_attr):
         try:
-            return text_attr()
+            text = text_attr()
+            if isinstance(text, str):
+                return text
         except Exception:
             pass
 
+    # 多个内容块时拼接全部文本块（跳过图片等非文本块），避免只取第一块丢失内容
     content = getattr(result, "content", None)
     if content:
-        first = content[0] if content else None
-        if isinstance(first, dict):
-            if first.get("type") == "text":
-                return first.get("text", "")
-        else:
-            t = getattr(first, "type", None)
-            if t == "text":
-                return getattr(first, "text", "") or getattr(first, "value", "")
+        texts = []
+        for block in content:
+            if isinstance(block, dict):
+                if block.get("type") == "text":
+                    texts.append(block.get("text") or "")
+            elif getattr(block, "type", None) == "text":
+                texts.append(getattr(block, "text", "") or getattr(block, "value", "") or "")
+        if texts:
+            return "\n".join(texts)
 
     value = getattr(result, "value", None)
     if isinstance(value, str):
@@ -44,16 +126,277 @@ def to_text(result: Any) -> str:
     return str(result)
 
 
+def _parse_arguments(arguments_str: Any) -> Any:
+    """解析 tool_call 中的 arguments：JSON 字符串解析一次，字典原样返回，其他类型视为空参数。"""
+    # 空串/None 合并为一个分支；类型判断用 __class__ 直接比较，省去 isinstance 的子类检查
+    if not arguments_str:
+        return {}
+    cls = arguments_str.__class__
+    if cls is str:
+        # 无参数工具通常传 "{}"，直接返回空字典，不进入解析器
+        if arguments_str == "{}":
+            return {}
+        return _json_loads(arguments_str)
+    if cls is dict:
+        return arguments_str
+    if isinstance(arguments_str, str):
+        return _json_loads(str(arguments_str))
+    if isinstance(arguments_str, dict):
+        return arguments_str
+    return {}
+
+
+def _input_schema(tool_info: Any) -> Optional[Dict[str, Any]]:
+    """取工具声明的参数 schema（兼容 mcp Tool 对象与缓存中的字典形式）。"""
+    if isinstance(tool_info, dict):
+        return tool_info.get("inputSchema")
+    return getattr(tool_info, "inputSchema", None)
+
+
+def _is_read_only(tool_info: Any) -> bool:
+    """工具是否声明为只读（兼容 mcp Tool 对象与缓存中的字典形式）。"""
+    if isinstance(tool_info, dict):
+        annotations = tool_info.get("annotations")
+    else:
+        annotations = getattr(tool_info, "annotations", None)
+    if isinstance(annotations, dict):
+        return annotations.get("readOnlyHint") is True
+    return getattr(annotations, "readOnlyHint", None) is True
+
+
+def _tool_result(tool_call_id: str, name: Any, success: bool, content: Any) -> Dict[str, Any]:
+    """构造统一结构的工具执行结果。"""
+    return {
+        "tool_call_id": tool_call_id,
+        "name": name,
+        "success": success,
+        "is_error": not success,
+        "content": content,
+    }
+
+
+# 无参数描述时使用的空参数 schema，所有工具共享同一对象（下游只读）
+_EMPTY_SCHEMA: Dict[str, Any] = {"type": "object", "properties": {}, "required": []}
+
+
+def _error_result(tool_call: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """根据原始 tool_call 构造失败结果（无法提前取得 id/名称的错误路径使用）。"""
+    return _tool_result(
+        tool_call.get("id", ""),
+        tool_call.get("function", {}).get("name", _UNKNOWN_NAME),
+        False,
+        content,
+    )
+
+
+def _to_openai_tool(name: str, description: Optional[str],
+                    schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """将 MCP 工具转换为 OpenAI 工具格式（HTTP 与 STDIO 共用），parameters 直接使用工具声明的 inputSchema。"""
+    if not isinstance(schema, dict):
+        schema = None
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description or "",
+            "parameters": schema or _EMPTY_SCHEMA,
+        },
+    }
+
+
+_bg_loop: Optional[asyncio.AbstractEventLoop] = None
+_bg_loop_lock = threading.Lock()
+
+
+def _get_bg_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取（必要时启动）后台常驻事件循环。
+
+    连接池中的 fastmcp.Client 绑定在创建它的事件循环上，
+    因此所有 MCP 协程统一提交到这一个循环中执行。
+    """
+    global _bg_loop
+    with _bg_loop_lock:
+        if _bg_loop is None or _bg_loop.is_closed():
+            # uvloop 随 uvicorn[standard] 安装；只影响本模块的后台循环，不修改全局事件循环策略
+            loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="mcp-tool-loop", daemon=True).start()
+            _bg_loop = loop
+        return _bg_loop
+
+
 def _run(coro):
-    """在当前或新的事件循环中运行协程并返回结果。"""
+    """在后台常驻事件循环中运行协程并返回结果。"""
+    loop = _get_bg_loop()
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            future = asyncio.run_coroutine_threadsafe(coro, loop)
-            return future.result()
-        return loop.run_until_complete(coro)
+        running = asyncio.get_running_loop()
     except RuntimeError:
-        return asyncio.run(coro)
+        running = None
+    if running is loop:
+        # 在后台循环自身线程中同步等待会死锁（如工具回调里再调用同步接口）
+        coro.close()
+        raise RuntimeError("不能在 MCP 后台事件循环中调用同步接口，请直接 await 对应的 a* 异步方法")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+class _McpClientPool:
+    """
+    按连接目标缓存已建立会话的 fastmcp.Client，避免每次调用都重新握手。
+
+    仅在后台事件循环中使用；同一目标的建连与丢弃由各自的锁串行化，不同目标互不阻塞。
+    工具调用本身不加锁：会话按请求 id 区分响应，同一连接上的并发调用互不干扰。
+    客户端由所有执行器共享：通过 use() 使用的调用计入 in-flight，关闭时跳过仍在使用的客户端；
+    空闲超过 _POOL_IDLE_TIMEOUT 的客户端由后台任务回收，下次使用时重新连接。
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Client] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # 各目标正在进行的调用数与最近一次使用时间
+        self._in_use: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def use(self, key: str, target: Any):
+        """获取客户端，并在使用期间将该目标计为使用中。"""
+        client = await self.acquire(key, target)
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield client
+        finally:
+            remaining = self._in_use[key] - 1
+            if remaining:
+                self._in_use[key] = remaining
+            else:
+                del self._in_use[key]
+            self._last_used[key] = time.monotonic()
+
+    async def acquire(self, key: str, target: Any) -> Client:
+        """获取已连接的客户端，不存在或已断开时重新建立连接。"""
+        client = self._clients.get(key)
+        if client is not None and client.is_connected():
+            return client
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            client = self._clients.get(key)
+            if client is not None and client.is_connected():
+                return client
+            if client is not None:
+                await self._close_quietly(client)
+            client = Client(_make_transport(target))
+            await client.__aenter__()
+            self._clients[key] = client
+            self._last_used[key] = time.monotonic()
+            if self._sweeper is None or self._sweeper.done():
+                self._sweeper = asyncio.get_running_loop().create_task(self._sweep_idle())
+            return client
+
+    async def discard(self, key: str, client: Optional[Client] = None) -> None:
+        """
+        关闭并移除指定目标的客户端。
+
+        传入 client 时仅当池中仍是该客户端才移除，避免并发调用者关掉别人刚重建的连接。
+        """
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            current = self._clients.get(key)
+            if current is None or (client is not None and current is not client):
+                return
+            del self._clients[key]
+        await self._close_quietly(current)
+
+    async def close_idle(self, key: str, idle_for: float = 0.0) -> None:
+        """关闭指定目标的客户端，但跳过仍有调用在进行、或空闲时间不足 idle_for 秒的客户端。"""
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if self._in_use.get(key):
+                return
+            if idle_for and time.monotonic() - self._last_used.get(key, 0.0) < idle_for:
+                return
+            client = self._clients.pop(key, None)
+            self._last_used.pop(key, None)
+        if client is not None:
+            await self._close_quietly(client)
+
+    async def _sweep_idle(self) -> None:
+        """定期回收空闲客户端；池为空时结束，新建连接时重新启动。"""
+        while self._clients:
+            await asyncio.sleep(_POOL_SWEEP_INTERVAL)
+            for key in list(self._clients):
+                await self.close_idle(key, _POOL_IDLE_TIMEOUT)
+
+    async def close_all(self) -> None:
+        """关闭全部客户端（进程退出时调用）。"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(self._close_quietly(c) for c in clients.values()))
+
+    @staticmethod
+    async def _close_quietly(client: Client) -> None:
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+_client_pool = _McpClientPool()
+
+
+@atexit.register
+def _shutdown_bg_loop() -> None:
+    """进程退出时关闭池中连接（终止 STDIO 子进程）并停止后台循环。"""
+    loop = _bg_loop
+    if loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_client_pool.close_all(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    """进程内共享的 SSL 上下文；加载 CA 证书开销较大，只在首次建立 HTTP 客户端时创建一次。"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+
+def _mcp_httpx_client(headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[httpx.Timeout] = None,
+                      auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+    """
+    MCP HTTP 传输使用的 httpx 客户端（替代 mcp 默认工厂）。
+
+    在默认配置基础上延长空闲连接保活时间，使同一服务器的连续工具调用复用连接；
+    安装 h2 时启用 HTTP/2，并发调用在同一连接上多路复用；重连时复用共享的 SSL 上下文。
+    """
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        verify=_get_ssl_context(),
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0),
+    )
+
+
+def _make_transport(target: Any) -> Any:
+    """根据连接目标创建 fastmcp 传输；HTTP/SSE 传输统一使用 _mcp_httpx_client。"""
+    transport = infer_transport(target)
+    if isinstance(transport, (StreamableHttpTransport, SSETransport)) and transport.httpx_client_factory is None:
+        transport.httpx_client_factory = _mcp_httpx_client
+    return transport
+
+
+def _stdio_client_key(config: Dict[str, Any]) -> str:
+    """STDIO 服务器配置对应的连接池键，相同命令/参数/环境共享同一子进程。"""
+    return _json_dumps(config, sort_keys=True)
 
 
 class McpToolExecute:
@@ -62,19 +405,30 @@ class McpToolExecute:
     def __init__(self,
                  mcp_servers: Optional[List[Dict[str, Any]]] = None,
                  stdio_mcp_servers: Optional[List[Dict[str, Any]]] = None,
-                 config_dir: Optional[str] = None):
+                 config_dir: Optional[str] = None,
+                 use_cache: bool = True):
         """
         Args:
             mcp_servers: HTTP MCP服务器列表，如 [{"name": "server", "url": "http://127.0.0.1:8000/mcp"}]
             stdio_mcp_servers: STDIO MCP服务器列表，如 [{"name": "server", "command": "python", "args": ["-m", "..."], "cwd": "...", "env": {...}}]
-            config_dir: 预留参数（不使用）
+            config_dir: 配置目录，工具列表缓存写入其下的 mcp_tools_cache（未提供时使用 config.json 中的 config_dir）
+            use_cache: 是否使用磁盘缓存的工具列表，命中时启动阶段无需连接各 MCP 服务器
         """
         self.mcp_servers = mcp_servers or []
         self.stdio_mcp_servers = stdio_mcp_servers or []
         self.config_dir = config_dir
+        self.use_cache = use_cache
 
         self.tools: List[Dict[str, Any]] = []
-        self.tool_metadata: Dict[str, Dict[str, Any]] = {}
+        # 工具元数据：构建完成后以只读视图发布，调用路径上不会被意外修改
+        self.tool_metadata: Mapping[str, Dict[str, Any]] = MappingProxyType({})
+        # 工具名集合，构建完成后不再变化，供 validate_tool_call 做 O(1) 判断
+        self._tool_name_set: frozenset = frozenset()
+        # 调用热路径用的索引：前缀名 -> (原始工具名, 连接池键, 连接目标, 是否只读)
+        self._call_targets: Dict[str, tuple] = {}
+        self._tools_lock = asyncio.Lock()
+        # 本执行器用到的连接池键，用于 aclose 时释放连接
+        self._client_keys: set = set()
 
     @staticmethod
     def _make_stdio_server_config(stdio_server: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -122,100 +476,199 @@ class McpToolExecute:
             }
         }
 
-    def init(self):
-        """初始化并构建工具列表"""
-        self.build_tools()
+    def init(self, force_refresh: bool = False):
+        """
+        初始化并构建工具列表
 
-    def build_tools(self):
-        """构建工具列表，支持 HTTP 与 STDIO。"""
+        Args:
+            force_refresh: 为 True 时忽略磁盘缓存，重新从各服务器获取工具列表
+        """
+        if self.use_cache and not force_refresh and self._load_tools_cache():
+            return
+        if self.build_tools() and self.use_cache:
+            self._save_tools_cache()
+
+    def _tools_cache_path(self) -> str:
+        """工具列表缓存文件路径，以服务器配置的哈希作为文件名。"""
+        payload = json.dumps([_TOOLS_CACHE_VERSION, self.mcp_servers, self.stdio_mcp_servers],
+                             sort_keys=True, ensure_ascii=False, default=str)
+        cache_key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        cache_dir = os.path.join(self.config_dir or get_config_dir(), "mcp_tools_cache")
+        return os.path.join(cache_dir, f"{cache_key}.json")
+
+    def _load_tools_cache(self) -> bool:
+        """从磁盘缓存加载工具列表，成功返回 True；缓存不存在、损坏或已过期时返回 False。"""
         try:
-            self.tools = []
-            self.tool_metadata = {}
-
-            # HTTP 服务器：直接传入 /mcp 端点 URL
-            for mcp_server in self.mcp_servers:
-                server_name = mcp_server.get("name")
-                server_url = mcp_server.get("url")
-                if not server_name or not server_url:
-                    continue
-
-                async def _list_http():
-                    async with Client(server_url) as client:
-                        return await client.list_tools()
-
-                tools_list = _run(_list_http())
-                for tool in tools_list:
-                    tool_name = getattr(tool, "name", None)
-                    if not tool_name:
-                        continue
+            with open(self._tools_cache_path(), "rb") as f:
+                cached = _json_loads(f.read())
+            if time.time() - cached["mtime"] > _TOOLS_CACHE_TTL:
+                return False
+            tools = cached["tools"]
+            tool_metadata = {sys.intern(name): info for name, info in cached["tool_metadata"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        # 缓存中不含 STDIO 配置（其 env 通常含密钥），按服务器名从当前配置重建
+        stdio_fields = {}
+        for stdio_server in self.stdio_mcp_servers:
+            config = self._make_stdio_server_config(stdio_server)
+            if config:
+                stdio_fields[stdio_server.get("name")] = {
+                    "server_config": config,
+                    "client_key": _stdio_client_key(config),
+                }
+        for name, info in tool_metadata.items():
+            if info.get("server_type") == "stdio":
+                fields = stdio_fields.get(info.get("server_name"))
+                if fields is None:
+                    return False
+                tool_metadata[name] = {**info, **fields}
+
+        self.tools = tools
+        self.tool_metadata = tool_metadata
+        self._index_tools()
+        self._client_keys = {info["client_key"] for info in tool_metadata.values() if info.get("client_key")}
+        return True
+
+    def _save_tools_cache(self) -> None:
+        """将工具列表写入磁盘缓存（先写临时文件再原子替换）。"""
+        try:
+            path = self._tools_cache_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tool_metadata = {}
+            for name, info in self.tool_metadata.items():
+                tool_info = info.get("tool_info")
+                if hasattr(tool_info, "model_dump"):
+                    tool_info = tool_info.model_dump(mode="json")
+                entry = {**info, "tool_info": tool_info}
+                if entry.get("server_type") == "stdio":
+                    # STDIO 配置（含 env）与由其生成的连接池键不落盘，加载时从当前配置重建
+                    entry.pop("server_config", None)
+                    entry.pop("client_key", None)
+                tool_metadata[name] = entry
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(_json_dumps({
+                    "tools": self.tools,
+                    "tool_metadata": tool_metadata,
+                    "mtime": time.time(),
+                }))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("[MCP_TOOL] 写入工具缓存失败: %s", e)
 
-                    prefixed = f"{server_name}_{tool_name}"
-                    self.tool_metadata[prefixed] = {
-                        "original_name": tool_name,
-                        "server_name": server_name,
+    def invalidate_tools_cache(self) -> None:
+        """删除当前服务器配置对应的工具列表缓存。"""
+        try:
+            os.remove(self._tools_cache_path())
+        except OSError:
+            pass
+
+    def build_tools(self) -> bool:
+        """构建工具列表，支持 HTTP 与 STDIO。全部服务器成功返回 True。"""
+        return _run(self._build_tools_async())
+
+    async def _list_http_tools(self, mcp_server: Dict[str, Any]) -> List[Any]:
+        """获取单个 HTTP 服务器的工具列表（直接传入 /mcp 端点 URL）。"""
+        server_url = mcp_server["url"]
+        self._client_keys.add(server_url)
+        async with _client_pool.use(server_url, server_url) as client:
+            return await client.list_tools()
+
+    async def _list_stdio_tools(self, config: Dict[str, Any]) -> List[Any]:
+        """获取单个 STDIO 服务器的工具列表（通过配置启动进程，进程保留给后续调用复用）。"""
+        key = _stdio_client_key(config)
+        self._client_keys.add(key)
+        async with _client_pool.use(key, config) as client:
+            return await client.list_tools()
+
+    async def _build_tools_async(self) -> bool:
+        """并发获取所有服务器的工具列表，总耗时取决于最慢的服务器。"""
+        # 同一执行器的重复构建串行进行
+        async with self._tools_lock:
+            try:
+                tools: List[Dict[str, Any]] = []
+                tool_metadata: Dict[str, Dict[str, Any]] = {}
+
+                servers = []
+                coros = []
+                for mcp_server in self.mcp_servers:
+                    server_name = mcp_server.get("name")
+                    server_url = mcp_server.get("url")
+                    if not server_name or not server_url:
+                        continue
+                    servers.append((server_name, {
                         "server_url": server_url,
                         "server_type": "http",
-                        "tool_info": tool,
-                    }
-
-                    openai_tool = {
-                        "type": "function",
-                        "function": {
-                            "name": prefixed,
-                            "description": getattr(tool, "description", "") or "",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {},
-                                "required": [],
-                            },
-                        },
-                    }
-                    self.tools.append(openai_tool)
-
-            # STDIO 服务器：通过配置启动进程
-            for stdio_server in self.stdio_mcp_servers:
-                server_name = stdio_server.get("name")
-                config = self._make_stdio_server_config(stdio_server)
-                if not config:
-                    continue
-
-                async def _list_stdio():
-                    async with Client(config) as client:
-                        return await client.list_tools()
-
-                tools_list = _run(_list_stdio())
-                for tool in tools_list:
-                    tool_name = getattr(tool, "name", None)
-                    if not tool_name:
+                        "client_key": server_url,
+                    }))
+                    coros.append(self._list_http_tools(mcp_server))
+
+                for stdio_server in self.stdio_mcp_servers:
+                    server_name = stdio_server.get("name")
+                    config = self._make_stdio_server_config(stdio_server)
+                    if not config:
                         continue
-
-                    prefixed = f"{server_name}_{tool_name}"
-                    self.tool_metadata[prefixed] = {
-                        "original_name": tool_name,
-                        "server_name": server_name,
+                    servers.append((server_name, {
                         "server_type": "stdio",
                         "server_config": config,
-                        "tool_info": tool,
-                    }
-
-                    openai_tool = {
-                        "type": "function",
-                        "function": {
-                            "name": prefixed,
-                            "description": getattr(tool, "description", "") or "",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {},
-                                "required": [],
-                            },
-                        },
-                    }
-                    self.tools.append(openai_tool)
+                        "client_key": _stdio_client_key(config),
+                    }))
+                    coros.append(self._list_stdio_tools(config))
+
+                results = await asyncio.gather(*coros, return_exceptions=True)
+
+                all_ok = True
+                intern = sys.intern
+                append_tool = tools.append
+                for (server_name, server_fields), tools_list in zip(servers, results):
+                    if isinstance(tools_list, BaseException):
+                        logger.warning("[MCP_TOOL] 获取工具列表失败: %s - %s", server_name, tools_list)
+                        all_ok = False
+                        continue
 
-        except Exception:
-            import traceback
-            traceback.print_exc()
-            self.tools = []
+                    for tool in tools_list:
+                        tool_name = getattr(tool, "name", None)
+                        if not tool_name:
+                            continue
+
+                        prefixed = intern(f"{server_name}_{tool_name}")
+                        tool_metadata[prefixed] = {
+                            "original_name": tool_name,
+                            "server_name": server_name,
+                            **server_fields,
+                            "tool_info": tool,
+                        }
+
+                        append_tool(_to_openai_tool(prefixed, getattr(tool, "description", ""), _input_schema(tool)))
+
+                # 构建完成后整体替换，执行中的调用不会看到半成品列表
+                self.tools, self.tool_metadata = tools, tool_metadata
+                self._index_tools()
+                return all_ok
+            except Exception:
+                logger.exception("[MCP_TOOL] 构建工具列表失败")
+                self.tools = []
+                self.tool_metadata = {}
+                self._index_tools()
+                return False
+
+    def _index_tools(self) -> None:
+        """根据 tool_metadata 生成名称集合与调用索引，工具列表变化后调用。"""
+        if not isinstance(self.tool_metadata, MappingProxyType):
+            self.tool_metadata = MappingProxyType(self.tool_metadata)
+        call_targets = {}
+        for name, info in self.tool_metadata.items():
+            if info.get("server_type") == "stdio":
+                target = info["server_config"]
+                key = info.get("client_key") or _stdio_client_key(target)
+            else:
+                target = info["server_url"]
+                key = info["client_key"]
+            call_targets[name] = (info["original_name"], key, target, _is_read_only(info.get("tool_info")))
+        self._call_targets = call_targets
+        self._tool_name_set = frozenset(call_targets)
 
     def find_tool_info(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """根据前缀名称查找工具元数据。"""
@@ -227,21 +680,27 @@ class McpToolExecute:
             raise TypeError(f"arguments 必须是字典类型，当前类型: {type(arguments)}")
         arguments = arguments or {}
 
-        info = self.find_tool_info(tool_name)
-        if not info:
-            raise Exception(f"工具未找到: {tool_name}")
+        call_target = self._call_targets.get(tool_name)
+        if call_target is None:
+            raise LookupError(f"工具未找到: {tool_name}")
+        original, key, target, read_only = call_target
 
-        original = info["original_name"]
-        if info.get("server_type") == "stdio":
-            config = info["server_config"]
-            async with Client(config) as client:
-                result = await client.call_tool(original, arguments)
-                return to_text(result)
-        else:
-            server_url = info["server_url"]
-            async with Client(server_url) as client:
-                result = await client.call_tool(original, arguments)
-                return to_text(result)
+        async with _client_pool.use(key, target) as client:
+            try:
+                result = await client.call_tool(original, arguments, timeout=_CALL_TOOL_TIMEOUT)
+            except ToolError:
+                raise
+            except Exception:
+                if client.is_connected():
+                    raise
+                # 缓存的连接已失效（如服务器重启或子进程退出）：丢弃连接，下次调用时重建
+                await _client_pool.discard(key, client)
+                # 请求可能已在服务器上执行，只有只读工具可以安全地重连后重试一次
+                if not read_only:
+                    raise
+                client = await _client_pool.acquire(key, target)
+                result = await client.call_tool(original, arguments, timeout=_CALL_TOOL_TIMEOUT)
+        return to_text(result)
 
     def _accumulate_stream_result(self,
                                   tool_name: str,
@@ -252,29 +711,30 @@ class McpToolExecute:
         兼容旧接口名称：内部直接一次性调用并返回。
         若提供 on_tool_stream，则在完成后回调一次完整结果。
         """
-        async def _once():
-            text = await self._call_mcp_tool_once(tool_name, arguments)
-            if on_tool_stream:
-                try:
-                    print(f"[MCP_TOOL] on_tool_stream 调用: {tool_name} (tool_call_id={tool_call_id}) 成功, 内容长度={len(str(text))}")
-                except Exception:
-                    pass
-                try:
-                    on_tool_stream({
-                        "tool_call_id": tool_call_id,
-                        "name": tool_name,
-                        "success": True,
-                        "is_error": False,
-                        "content": text,
-                        "is_stream": False,
-                    })
-                except Exception as e:
-                    try:
-                        print(f"[MCP_TOOL] on_tool_stream 回调错误: {e}")
-                    except Exception:
-                        pass
-            return text
-        return _run(_once())
+        return _run(self._aaccumulate_stream_result(tool_name, arguments, on_tool_stream, tool_call_id))
+
+    async def _aaccumulate_stream_result(self,
+                                         tool_name: str,
+                                         arguments: Dict[str, Any],
+                                         on_tool_stream: Optional[Callable[[Dict[str, Any]], None]] = None,
+                                         tool_call_id: str = "") -> str:
+        """_accumulate_stream_result 的异步版本，直接在当前事件循环中调用。"""
+        text = await self._call_mcp_tool_once(tool_name, arguments)
+        if on_tool_stream:
+            logger.debug("[MCP_TOOL] on_tool_stream 调用: %s (tool_call_id=%s) 成功, 内容长度=%d",
+                         tool_name, tool_call_id, len(text))
+            try:
+                on_tool_stream({
+                    "tool_call_id": tool_call_id,
+                    "name": tool_name,
+                    "success": True,
+                    "is_error": False,
+                    "content": text,
+                    "is_stream": False,
+                })
+            except Exception as e:
+                logger.warning("[MCP_TOOL] on_tool_stream 回调错误: %s", e)
+        return text
 
     def execute_tools(self,
                       tool_calls: List[Dict[str, Any]],
@@ -290,154 +750,112 @@ class McpToolExecute:
                              tool_calls: List[Dict[str, Any]],
                              on_tool_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """执行多个工具调用（内部一次性返回结果）。"""
-        results: List[Dict[str, Any]] = []
-        for tool_call in tool_calls:
-            try:
-                function_info = tool_call.get("function", {})
-                tool_name = function_info.get("name")
-                arguments_str = function_info.get("arguments", "{}")
-
-                if not tool_name:
-                    result = {
-                        "tool_call_id": tool_call.get("id", ""),
-                        "name": "unknown",
-                        "success": False,
-                        "is_error": True,
-                        "content": "工具名称不能为空",
-                    }
-                    results.append(result)
-                    if on_tool_result:
-                        on_tool_result(result)
-                    continue
+        return _run(self.aexecute_tools_stream(tool_calls, on_tool_result))
 
-                try:
-                    if isinstance(arguments_str, str):
-                        arguments = json.loads(arguments_str) if arguments_str else {}
-                    elif isinstance(arguments_str, dict):
-                        arguments = arguments_str
-                    else:
-                        arguments = {}
-                except json.JSONDecodeError as e:
-                    result = {
-                        "tool_call_id": tool_call.get("id", ""),
-                        "name": tool_name,
-                        "success": False,
-                        "is_error": True,
-                        "content": f"参数解析失败: {str(e)}",
-                    }
-                    results.append(result)
-                    if on_tool_result:
-                        on_tool_result(result)
-                    continue
-
-                def _call():
-                    async def _inner():
-                        return await self._call_mcp_tool_once(tool_name, arguments)
-                    return _run(_inner())
-
-                text = _call()
-                final = {
-                    "tool_call_id": tool_call.get("id", ""),
-                    "name": tool_name,
-                    "success": True,
-                    "is_error": False,
-                    "content": text,
-                }
-                results.append(final)
-                if on_tool_result:
-                    on_tool_result(final)
+    async def aexecute_tools_stream(self,
+                                    tool_calls: List[Dict[str, Any]],
+                                    on_tool_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        execute_tools_stream 的异步版本，供已处于事件循环中的调用方直接 await。
 
-            except Exception as e:
-                err = {
-                    "tool_call_id": tool_call.get("id", ""),
-                    "name": tool_call.get("function", {}).get("name", "unknown"),
-                    "success": False,
-                    "is_error": True,
-                    "content": f"工具执行失败: {str(e)}",
-                }
-                results.append(err)
-                if on_tool_result:
-                    on_tool_result(err)
+        各工具调用相互独立，并发执行；结果顺序与 tool_calls 一致。
+        """
+        run_one = self._aexecute_call
+        outcomes = await asyncio.gather(
+            *(run_one(tool_call, on_tool_result) for tool_call in tool_calls),
+            return_exceptions=True,
+        )
+        results: List[Dict[str, Any]] = []
+        for tool_call, outcome in zip(tool_calls, outcomes):
+            if isinstance(outcome, BaseException):
+                outcome = _error_result(tool_call, _ERR_EXEC_PREFIX + str(outcome))
+            results.append(outcome)
         return results
 
     def execute_single_tool_stream(self,
                                    tool_call: Dict[str, Any],
                                    on_tool_stream: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """执行单个工具调用（保留名称以兼容，内部一次性返回）。"""
+        return _run(self.aexecute_single_tool_stream(tool_call, on_tool_stream))
+
+    async def aexecute_single_tool_stream(self,
+                                          tool_call: Dict[str, Any],
+                                          on_tool_stream: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """execute_single_tool_stream 的异步版本。"""
+        return await self._aexecute_call(tool_call, on_tool_stream, stream_callback=True)
+
+    async def _aexecute_call(self,
+                             tool_call: Dict[str, Any],
+                             callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             stream_callback: bool = False) -> Dict[str, Any]:
+        """
+        执行单个工具调用并回调结果（aexecute_tools_stream 与 aexecute_single_tool_stream 共用）。
+
+        stream_callback 为 True 时按 on_tool_stream 约定回调：成功结果由 _aaccumulate_stream_result 回调，
+        执行异常时的回调错误只记录日志；否则按 on_tool_result 约定回调最终结果。
+        """
+        tool_call_id = tool_call.get("id", "")
+        tool_name = _UNKNOWN_NAME
         try:
             function_info = tool_call.get("function", {})
             tool_name = function_info.get("name")
             arguments_str = function_info.get("arguments", "{}")
-            tool_call_id = tool_call.get("id", "")
 
-            if not tool_name:
-                result = {
-                    "tool_call_id": tool_call_id,
-                    "name": "unknown",
-                    "success": False,
-                    "is_error": True,
-                    "content": "工具名称不能为空",
-                }
-                if on_tool_stream:
-                    on_tool_stream(result)
+            if tool_name:
+                # 工具名集合很小且被反复查询，驻留后字典查找可直接按指针比较
+                tool_name = sys.intern(tool_name)
+            else:
+                result = _tool_result(tool_call_id, _UNKNOWN_NAME, False, _ERR_EMPTY_NAME)
+                if callback:
+                    callback(result)
                 return result
 
             try:
-                if isinstance(arguments_str, str):
-                    arguments = json.loads(arguments_str) if arguments_str else {}
-                elif isinstance(arguments_str, dict):
-                    arguments = arguments_str
-                else:
-                    arguments = {}
-            except json.JSONDecodeError as e:
-                result = {
-                    "tool_call_id": tool_call_id,
-                    "name": tool_name,
-                    "success": False,
-                    "is_error": True,
-                    "content": f"参数解析失败: {str(e)}",
-                }
-                if on_tool_stream:
-                    on_tool_stream(result)
+                arguments = _parse_arguments(arguments_str)
+            except _JSONDecodeError as e:
+                result = _tool_result(tool_call_id, tool_name, False, _ERR_PARSE_PREFIX + str(e))
+                if callback:
+                    callback(result)
                 return result
 
-            final_text = self._accumulate_stream_result(tool_name, arguments, on_tool_stream, tool_call_id)
-            result = {
-                "tool_call_id": tool_call_id,
-                "name": tool_name,
-                "success": True,
-                "is_error": False,
-                "content": final_text,
-            }
-            if on_tool_stream:
-                try:
-                    print(f"[MCP_TOOL] on_tool_stream 完成: {tool_name} (tool_call_id={tool_call_id}) 成功, 内容长度={len(str(final_text))}")
-                except Exception:
-                    pass
+            if stream_callback:
+                text = await self._aaccumulate_stream_result(tool_name, arguments, callback, tool_call_id)
+                if callback:
+                    logger.debug("[MCP_TOOL] on_tool_stream 完成: %s (tool_call_id=%s) 成功, 内容长度=%d",
+                                 tool_name, tool_call_id, len(text))
+                return _tool_result(tool_call_id, tool_name, True, text)
+
+            text = await self._call_mcp_tool_once(tool_name, arguments)
+            result = _tool_result(tool_call_id, tool_name, True, text)
+            if callback:
+                callback(result)
             return result
 
         except Exception as e:
-            error_result = {
-                "tool_call_id": tool_call.get("id", ""),
-                "name": tool_call.get("function", {}).get("name", "unknown"),
-                "success": False,
-                "is_error": True,
-                "content": f"工具执行失败: {str(e)}",
-            }
-            if on_tool_stream:
-                try:
-                    print(f"[MCP_TOOL] on_tool_stream 错误: {error_result.get('name')} (tool_call_id={error_result.get('tool_call_id')}) 错误信息={error_result.get('content')}")
-                except Exception:
-                    pass
+            error_result = _tool_result(tool_call_id, tool_name, False, _ERR_EXEC_PREFIX + str(e))
+            if callback:
+                if not stream_callback:
+                    callback(error_result)
+                    return error_result
+                logger.debug("[MCP_TOOL] on_tool_stream 错误: %s (tool_call_id=%s) 错误信息=%s",
+                             error_result["name"], error_result["tool_call_id"], error_result["content"])
                 try:
-                    on_tool_stream(error_result)
+                    callback(error_result)
                 except Exception as e:
-                    try:
-                        print(f"[MCP_TOOL] on_tool_stream 回调错误: {e}")
-                    except Exception:
-                        pass
+                    logger.warning("[MCP_TOOL] on_tool_stream 回调错误: %s", e)
             return error_result
 
+    async def aclose(self) -> None:
+        """释放本执行器使用的 MCP 连接。"""
+        keys, self._client_keys = self._client_keys, set()
+        for key in keys:
+            # 连接由所有执行器共享：其他会话仍有调用在进行时保留，之后由空闲回收关闭
+            await _client_pool.close_idle(key)
+
+    def close(self) -> None:
+        """同步关闭（供同步调用方使用）。"""
+        _run(self.aclose())
+
     def get_available_tools(self) -> List[Dict[str, Any]]:
         """获取可用工具列表（OpenAI 工具格式）。"""
         return self.tools
@@ -448,74 +866,88 @@ class McpToolExecute:
 
     def validate_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
         """验证工具调用结构。"""
+        # 未配置任何 MCP 服务器或未构建出工具时，直接判定无效，避免后续无意义的调用
+        if not self.tool_metadata:
+            return {"is_valid": False, "error_message": "MCP工具未初始化或无可用工具"}
+        error_message = self._fast_validate(tool_call, self._tool_name_set)
+        return {"is_valid": error_message is None, "error_message": error_message}
+
+    @staticmethod
+    def _fast_validate(tool_call: Dict[str, Any], name_set: frozenset) -> Optional[str]:
+        """校验单个调用的结构与工具名，通过返回 None，否则返回错误信息。"""
         try:
-            function_info = tool_call.get("function", {})
-            if not function_info.get("name"):
-                raise ValueError("工具名称缺失")
-            return {"is_valid": True, "error_message": None}
+            tool_name = tool_call.get("function", {}).get("name")
         except Exception as e:
-            return {"is_valid": False, "error_message": f"验证失败: {str(e)}"}
+            return f"验证失败: {str(e)}"
+        if not tool_name:
+            return "验证失败: 工具名称缺失"
+        if tool_name not in name_set:
+            return f"验证失败: 工具未找到: {tool_name}"
+        return None
 
     def execute_tools_with_validation(self,
                                       tool_calls: List[Dict[str, Any]],
                                       on_tool_stream: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """带验证的工具调用执行。"""
-        results: List[Dict[str, Any]] = []
-        for tool_call in tool_calls:
-            validation = self.validate_tool_call(tool_call)
-            if not validation.get("is_valid"):
-                err = {
-                    "tool_call_id": tool_call.get("id", ""),
-                    "name": tool_call.get("function", {}).get("name", "unknown"),
-                    "success": False,
-                    "is_error": True,
-                    "content": validation.get("error_message"),
-                }
-                results.append(err)
+        return _run(self.aexecute_tools_with_validation(tool_calls, on_tool_stream))
+
+    async def aexecute_tools_with_validation(self,
+                                             tool_calls: List[Dict[str, Any]],
+                                             on_tool_stream: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """execute_tools_with_validation 的异步版本，整批调用只切换一次线程。"""
+        results: List[Dict[str, Any]] = [None] * len(tool_calls)
+        pending: List[int] = []
+        # 工具名集合在整批调用期间不变，只取一次；未初始化时整批直接判定无效
+        name_set = self._tool_name_set
+        batch_error = None if name_set else "MCP工具未初始化或无可用工具"
+        fast_validate = self._fast_validate
+        for index, tool_call in enumerate(tool_calls):
+            error_message = batch_error or fast_validate(tool_call, name_set)
+            if error_message is not None:
+                err = _error_result(tool_call, error_message)
+                results[index] = err
                 if on_tool_stream:
-                    try:
-                        print(f"[MCP_TOOL] on_tool_stream 验证失败: {err.get('name')} (tool_call_id={err.get('tool_call_id')}) 错误信息={err.get('content')}")
-                    except Exception:
-                        pass
+                    logger.debug("[MCP_TOOL] on_tool_stream 验证失败: %s (tool_call_id=%s) 错误信息=%s",
+                                 err["name"], err["tool_call_id"], err["content"])
                     try:
                         on_tool_stream(err)
                     except Exception as e:
-                        try:
-                            print(f"[MCP_TOOL] on_tool_stream 回调错误: {e}")
-                        except Exception:
-                            pass
+                        logger.warning("[MCP_TOOL] on_tool_stream 回调错误: %s", e)
                 continue
 
-            try:
-                result = self.execute_single_tool_stream(tool_call, on_tool_stream)
-                results.append(result)
-            except Exception as e:
-                err = {
-                    "tool_call_id": tool_call.get("id", ""),
-                    "name": tool_call.get("function", {}).get("name", "unknown"),
-                    "success": False,
-                    "is_error": True,
-                    "content": f"工具执行失败: {str(e)}",
-                }
-                results.append(err)
+            pending.append(index)
+
+        # 通过验证的调用并发执行，结果按原顺序回填
+        run_one = self.aexecute_single_tool_stream
+        outcomes = await asyncio.gather(
+            *(run_one(tool_calls[index], on_tool_stream) for index in pending),
+            return_exceptions=True,
+        )
+        for index, outcome in zip(pending, outcomes):
+            if not isinstance(outcome, BaseException):
+                results[index] = outcome
+            else:
+                tool_call = tool_calls[index]
+                err = _error_result(tool_call, _ERR_EXEC_PREFIX + str(outcome))
+                results[index] = err
                 if on_tool_stream:
-                    try:
-                        print(f"[MCP_TOOL] on_tool_stream 执行失败: {err.get('name')} (tool_call_id={err.get('tool_call_id')}) 错误信息={err.get('content')}")
-                    except Exception:
-                        pass
+                    logger.debug("[MCP_TOOL] on_tool_stream 执行失败: %s (tool_call_id=%s) 错误信息=%s",
+                                 err["name"], err["tool_call_id"], err["content"])
                     try:
                         on_tool_stream(err)
                     except Exception as e:
-                        try:
-                            print(f"[MCP_TOOL] on_tool_stream 回调错误: {e}")
-                        except Exception:
-                            pass
+                        logger.warning("[MCP_TOOL] on_tool_stream 回调错误: %s", e)
         return results
 
     def get_tool_execution_stats(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """统计工具执行情况。"""
-        total = len(results)
-        success = sum(1 for r in results if r.get("success"))
+        # 单次遍历同时计数
+        total = 0
+        success = 0
+        for r in results:
+            total += 1
+            if r.get("success"):
+                success += 1
         error = total - success
         return {
             "total_count": total,
@@ -2,7 +2,9 @@
 消息管理器
 负责处理聊天消息的保存、检索和管理
 """
+import threading
 import time
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 
 # 导入数据库模型
@@ -12,15 +14,24 @@ from ...models.message import MessageCreate
 class MessageManager:
     """消息管理器"""
     
-    def __init__(self):
+    # 保存路径的字段均由内部调用传入，关键字段类型正确时跳过 pydantic 校验直接构造
+    fast_path: bool = True
+    
+    def __init__(self, max_cache_size: int = 100):
         """
         初始化消息管理器
         
         注意：现在直接使用 models 模块中的数据库操作方法
+        
+        Args:
+            max_cache_size: 最近消息缓存的最大条数
         """
         
-        # 缓存最近保存的消息
-        self.recent_messages = {}
+        # 缓存最近保存/访问的消息（LRU：命中时移到末尾，超限时淘汰最久未用的）
+        self.recent_messages: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_cache_size = max_cache_size
+        # 管理器可能被多个请求线程共享，缓存读写需加锁
+        self._cache_lock = threading.RLock()
         
         # 待保存的消息队列
         self.pending_saves = []
@@ -47,7 +58,7 @@ class MessageManager:
         """
         try:
             # 创建消息数据
-            message_data = MessageCreate(
+            message_data = self._new_message(
                 id=message_id,
                 sessionId=session_id,
                 role="user",
@@ -55,12 +66,7 @@ class MessageManager:
             )
             
             # 使用同步方法保存到数据库
-            saved_message = MessageCreate.create_sync(message_data)
-            
-            # 缓存消息
-            if saved_message:
-                self._cache_message(saved_message)
-                self.stats["messages_saved"] += 1
+            saved_message = self._save_message(message_data)
             
             return {
                 "success": True,
@@ -99,7 +105,7 @@ class MessageManager:
         """
         try:
             # 创建消息数据
-            message_data = MessageCreate(
+            message_data = self._new_message(
                 id=message_id,
                 sessionId=session_id,
                 role="assistant",
@@ -110,12 +116,7 @@ class MessageManager:
             )
             
             # 使用同步方法保存到数据库
-            saved_message = MessageCreate.create_sync(message_data)
-            
-            # 缓存消息
-            if saved_message:
-                self._cache_message(saved_message)
-                self.stats["messages_saved"] += 1
+            saved_message = self._save_message(message_data)
             
             return {
                 "success": True,
@@ -152,7 +153,7 @@ class MessageManager:
         """
         try:
             # 创建消息数据
-            message_data = MessageCreate(
+            message_data = self._new_message(
                 id=message_id,
                 sessionId=session_id,
                 role="tool",
@@ -162,12 +163,7 @@ class MessageManager:
             )
             
             # 使用同步方法保存到数据库
-            saved_message = MessageCreate.create_sync(message_data)
-            
-            # 缓存消息
-            if saved_message:
-                self._cache_message(saved_message)
-                self.stats["messages_saved"] += 1
+            saved_message = self._save_message(message_data)
             
             return {
                 "success": True,
@@ -183,6 +179,67 @@ class MessageManager:
                 "error": error_message
             }
     
+    def save_tool_messages(self, session_id: str, tool_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量保存工具消息（一次批量写入，失败时逐条保存）
+        
+        Args:
+            session_id: 会话ID
+            tool_messages: 工具消息列表，每项包含 content、tool_call_id，可选 message_id、metadata
+            
+        Returns:
+            与 save_tool_message 返回结构一致的结果列表，顺序与输入一致
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tool_messages)
+        batch = []
+        for index, tool_message in enumerate(tool_messages):
+            try:
+                batch.append((index, self._new_message(
+                    id=tool_message.get("message_id"),
+                    sessionId=session_id,
+                    role="tool",
+                    content=tool_message.get("content"),
+                    tool_call_id=tool_message.get("tool_call_id"),
+                    metadata=tool_message.get("metadata")
+                )))
+            except Exception as e:
+                results[index] = self._tool_save_error(e)
+        
+        if batch:
+            try:
+                saved_messages = MessageCreate.create_many_sync([message_data for _, message_data in batch])
+                for (index, _), saved_message in zip(batch, saved_messages):
+                    results[index] = self._saved_result(saved_message)
+            except Exception:
+                for index, message_data in batch:
+                    try:
+                        results[index] = self._saved_result(self._create_if_missing(message_data))
+                    except Exception as e:
+                        results[index] = self._tool_save_error(e)
+        
+        return results
+    
+    def _saved_result(self, saved_message: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """缓存已写入的消息并构造保存结果"""
+        if saved_message:
+            self._cache_message(saved_message)
+            self.stats["messages_saved"] += 1
+        return {
+            "success": True,
+            "message": saved_message,
+            "message_id": saved_message.get("id") if saved_message else None
+        }
+    
+    @staticmethod
+    def _tool_save_error(e: Exception) -> Dict[str, Any]:
+        """构造工具消息保存失败的结果"""
+        error_message = f"保存工具消息失败: {str(e)}"
+        print(f"Error in save_tool_messages: {error_message}")
+        return {
+            "success": False,
+            "error": error_message
+        }
+    
     def get_session_messages(self, session_id: str, limit: int = None) -> List[Dict[str, Any]]:
         """
         获取会话消息
@@ -219,9 +276,11 @@ class MessageManager:
         """
         try:
             # 先检查缓存
-            if message_id in self.recent_messages:
-                self.stats["cache_hits"] += 1
-                return self.recent_messages[message_id]
+            with self._cache_lock:
+                if message_id in self.recent_messages:
+                    self.stats["cache_hits"] += 1
+                    self.recent_messages.move_to_end(message_id)
+                    return self.recent_messages[message_id]
             
             # 从数据库获取
             message = MessageCreate.get_by_id_sync(message_id)
@@ -256,19 +315,25 @@ class MessageManager:
             processed_count = 0
             errors = []
             
-            # 处理所有待保存的消息
-            for message_data in self.pending_saves:
-                try:
-                    saved_message = MessageCreate.create_sync(message_data)
-                    if saved_message:
-                        self._cache_message(saved_message)
-                        processed_count += 1
-                        self.stats["messages_saved"] += 1
-                except Exception as e:
-                    errors.append(f"保存消息失败: {str(e)}")
+            # 先取出当前队列，处理期间新加入的消息留待下次处理
+            pending, self.pending_saves = self.pending_saves, []
+            
+            # 批量写入；失败时逐条保存，以便定位具体失败的消息
+            try:
+                saved_messages = MessageCreate.create_many_sync(pending)
+            except Exception:
+                saved_messages = []
+                for message_data in pending:
+                    try:
+                        saved_messages.append(self._create_if_missing(message_data))
+                    except Exception as e:
+                        errors.append(f"保存消息失败: {str(e)}")
             
-            # 清空待保存队列
-            self.pending_saves.clear()
+            for saved_message in saved_messages:
+                if saved_message:
+                    self._cache_message(saved_message)
+                    processed_count += 1
+                    self.stats["messages_saved"] += 1
             
             return {
                 "success": len(errors) == 0,
@@ -284,6 +349,53 @@ class MessageManager:
                 "error": error_message
             }
     
+    def _new_message(self, **fields: Any) -> MessageCreate:
+        """
+        构造待保存的消息模型
+        
+        Args:
+            fields: MessageCreate 字段
+            
+        Returns:
+            消息模型；sessionId/content 不是字符串时走完整校验，由校验报错
+        """
+        if self.fast_path and isinstance(fields.get("sessionId"), str) and isinstance(fields.get("content"), str):
+            return MessageCreate.model_construct(**fields)
+        return MessageCreate(**fields)
+    
+    def _save_message(self, message_data: MessageCreate) -> Optional[Dict[str, Any]]:
+        """
+        同步写入单条消息并缓存
+        
+        Args:
+            message_data: 消息数据
+            
+        Returns:
+            写入后的数据库行
+        """
+        saved_message = MessageCreate.create_sync(message_data)
+        if saved_message:
+            self._cache_message(saved_message)
+            self.stats["messages_saved"] += 1
+        return saved_message
+    
+    @staticmethod
+    def _create_if_missing(message_data: MessageCreate) -> Optional[Dict[str, Any]]:
+        """
+        批量写入失败后的逐条保存：批量写入是原子的，若其已提交（失败发生在读取阶段）则直接返回已有的行
+        
+        Args:
+            message_data: 消息数据（ID 已由 create_many_sync 写回）
+            
+        Returns:
+            数据库中的消息行
+        """
+        if message_data.id:
+            existing = MessageCreate.get_by_id_sync(message_data.id)
+            if existing:
+                return existing
+        return MessageCreate.create_sync(message_data)
+    
     def _cache_message(self, message: Dict[str, Any]) -> None:
         """
         缓存消息
@@ -292,17 +404,20 @@ class MessageManager:
             message: 消息数据
         """
         if message and "id" in message:
-            # 限制缓存大小
-            if len(self.recent_messages) >= 100:
-                # 移除最旧的消息
-                oldest_key = next(iter(self.recent_messages))
-                del self.recent_messages[oldest_key]
-            
-            self.recent_messages[message["id"]] = message
+            message_id = message["id"]
+            with self._cache_lock:
+                if message_id in self.recent_messages:
+                    self.recent_messages.move_to_end(message_id)
+                self.recent_messages[message_id] = message
+                
+                # 限制缓存大小，移除最久未使用的消息
+                if len(self.recent_messages) > self.max_cache_size:
+                    self.recent_messages.popitem(last=False)
     
     def clear_cache(self) -> None:
         """清空缓存"""
-        self.recent_messages.clear()
+        with self._cache_lock:
+            self.recent_messages.clear()
     
     def clear_cache_for_session(self, session_id: str) -> None:
         """
@@ -314,10 +429,11 @@ class MessageManager:
         try:
             if not self.recent_messages:
                 return
-            # 找出属于该会话的消息ID
-            to_delete = [mid for mid, msg in self.recent_messages.items() if msg.get("sessionId") == session_id]
-            for mid in to_delete:
-                del self.recent_messages[mid]
+            with self._cache_lock:
+                # 找出属于该会话的消息ID
+                to_delete = [mid for mid, msg in self.recent_messages.items() if msg.get("sessionId") == session_id]
+                for mid in to_delete:
+                    del self.recent_messages[mid]
         except Exception as e:
             print(f"Error in clear_cache_for_session: {e}")
     
@@ -342,7 +458,9 @@ class MessageManager:
             包含缓存大小与按会话计数的统计
         """
         session_counts = {}
-        for msg in self.recent_messages.values():
+        with self._cache_lock:
+            messages = list(self.recent_messages.values())
+        for msg in messages:
             sid = msg.get("sessionId")
             if sid:
                 session_counts[sid] = session_counts.get(sid, 0) + 1
@@ -2,14 +2,81 @@
 工具结果处理器
 负责处理工具执行结果，生成总结和保存消息
 """
+import hashlib
 import json
+import os
+import threading
 import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 工具结果总结缓存：相同的工具结果直接复用已生成的总结，不再请求模型
+# 处理器随请求创建，缓存放在模块级以便跨请求复用
+_SUMMARY_CACHE_SIZE = 1024
+_SUMMARY_CACHE_TTL = 3600.0
+
+_summary_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+# 正在生成中的总结：并发的相同请求等待同一次模型调用的结果
+_summary_inflight: Dict[str, threading.Event] = {}
+_SUMMARY_WAIT_TIMEOUT = 60.0
+# 总结请求在工作线程中发出，与消息写库同时进行
+_summary_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool-summary")
+
+
+def _get_cached_summary(cache_key: str) -> Optional[str]:
+    """读取未过期的缓存总结（调用方需持有 _summary_cache_lock）。"""
+    cached = _summary_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < _SUMMARY_CACHE_TTL:
+        _summary_cache.move_to_end(cache_key)
+        return cached[1]
+    return None
+
+
+# 工具结果内容会写入消息并发送给模型，默认紧凑序列化以减少 token；调试时可设置该环境变量改为缩进输出
+_INDENT_TOOL_JSON = os.environ.get("TOOL_RESULT_JSON_INDENT", "").lower() in ("1", "true", "yes")
+
+
+def _dumps(obj: Any, sort_keys: bool = False) -> str:
+    """序列化为 JSON：优先 orjson，不支持的值（如超出 64 位的整数）回退到标准库。"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if _INDENT_TOOL_JSON else 0)
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        except TypeError:
+            pass
+    if _INDENT_TOOL_JSON:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+def _summary_cache_key(tool_results: List[Dict[str, Any]]) -> str:
+    """按工具名、是否出错与内容计算缓存键。"""
+    payload = json.dumps(
+        [(r.get("name"), bool(r.get("is_error", False)), r.get("content")) for r in tool_results],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
 
 class ToolResultProcessor:
     """工具结果处理器"""
     
+    # 总结请求的固定部分：逐字节保持不变，使服务商的提示缓存可以复用前缀
+    SUMMARY_SYSTEM_PROMPT = "你是一个专业的工具执行结果分析师。请根据提供的工具执行结果，生成一个简洁、准确的总结。"
+    SUMMARY_PROMPT_HEADER = "请总结以下工具执行结果，提供一个简洁的总结，说明这些工具执行的主要结果和意义。\n"
+    SUMMARY_CONTENT_LIMIT = 1000
+    
     def __init__(self, message_manager, ai_request_handler):
         """
         初始化工具结果处理器
@@ -37,23 +104,27 @@ class ToolResultProcessor:
             处理结果，包含保存的消息和可选的总结
         """
         try:
-            saved_messages = []
-            
-            # 保存每个工具结果为消息
-            for tool_result in tool_results:
-                metadata = {
-                    "toolCallId": tool_result.get("tool_call_id"),
-                    "toolName": tool_result.get("name"),
-                    "isError": tool_result.get("is_error", False)
-                }
-                
-                saved_message = self.message_manager.save_tool_message(
-                    session_id=session_id,
-                    content=self._format_tool_result_content(tool_result),
-                    tool_call_id=tool_result.get("tool_call_id", "unknown"),
-                    metadata=metadata
+            # 总结只依赖工具结果本身：先在工作线程中发出总结请求，再保存消息，两者同时进行
+            summary_future = None
+            if generate_summary and tool_results:
+                summary_future = _summary_executor.submit(
+                    self._generate_tool_results_summary, tool_results, session_id
                 )
-                saved_messages.append(saved_message)
+            
+            # 先整理全部工具结果，再一次性批量保存为消息
+            tool_messages = [
+                {
+                    "content": self._format_tool_result_content(tool_result),
+                    "tool_call_id": tool_result.get("tool_call_id", "unknown"),
+                    "metadata": {
+                        "toolCallId": tool_result.get("tool_call_id"),
+                        "toolName": tool_result.get("name"),
+                        "isError": tool_result.get("is_error", False)
+                    }
+                }
+                for tool_result in tool_results
+            ]
+            saved_messages = self.message_manager.save_tool_messages(session_id, tool_messages)
             
             result = {
                 "success": True,
@@ -61,9 +132,9 @@ class ToolResultProcessor:
                 "tool_results_count": len(tool_results)
             }
             
-            # 生成总结（如果需要）
-            if generate_summary and tool_results:
-                summary = self._generate_tool_results_summary(tool_results, session_id)
+            # 等待总结完成（失败时 _generate_tool_results_summary 返回 None，不影响已保存的消息）
+            if summary_future is not None:
+                summary = summary_future.result()
                 if summary:
                     result["summary"] = summary
             
@@ -93,9 +164,13 @@ class ToolResultProcessor:
             
             content = tool_result.get("content", "")
             
+            # 常见情况：MCP 工具结果已是字符串，直接返回
+            if isinstance(content, str):
+                return content
+            
             # 如果内容是字典或列表，转换为JSON字符串
             if isinstance(content, (dict, list)):
-                return json.dumps(content, ensure_ascii=False, indent=2)
+                return _dumps(content)
             
             return str(content)
             
@@ -116,65 +191,111 @@ class ToolResultProcessor:
             总结文本，如果生成失败则返回None
         """
         try:
-            # 构建总结提示
-            summary_prompt = self._build_summary_prompt(tool_results)
+            # 先查缓存；没有缓存时登记为生成中，相同内容的并发请求只发一次
+            cache_key = _summary_cache_key(tool_results)
+            with _summary_cache_lock:
+                cached = _get_cached_summary(cache_key)
+                if cached is not None:
+                    return cached
+                inflight = _summary_inflight.get(cache_key)
+                if inflight is None:
+                    _summary_inflight[cache_key] = threading.Event()
             
-            # 准备消息
-            messages = [
-                {
-                    "role": "system",
-                    "content": "你是一个专业的工具执行结果分析师。请根据提供的工具执行结果，生成一个简洁、准确的总结。"
-                },
-                {
-                    "role": "user",
-                    "content": summary_prompt
-                }
-            ]
-            
-            # 调用AI生成总结
-            response = self.ai_request_handler.handle_request(
-                messages=messages,
-                model="gpt-3.5-turbo",
-                temperature=0.3,
-                max_tokens=500
-            )
-            
-            if response.get("success") and response.get("choices"):
-                summary = response["choices"][0]["message"]["content"]
-                return summary.strip()
+            if inflight is not None:
+                # 等待正在进行的同一请求；其失败时同样返回 None
+                inflight.wait(_SUMMARY_WAIT_TIMEOUT)
+                with _summary_cache_lock:
+                    return _get_cached_summary(cache_key)
             
-            return None
+            try:
+                return self._request_summary(cache_key, tool_results)
+            finally:
+                with _summary_cache_lock:
+                    _summary_inflight.pop(cache_key).set()
             
         except Exception as e:
             print(f"Error generating tool results summary: {str(e)}")
             return None
     
+    def _request_summary(self,
+                         cache_key: str,
+                         tool_results: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        请求模型生成总结并写入缓存
+        
+        Args:
+            cache_key: 缓存键
+            tool_results: 工具执行结果列表
+            
+        Returns:
+            总结文本，如果生成失败则返回None
+        """
+        # 构建总结提示
+        summary_prompt = self._build_summary_prompt(tool_results)
+        
+        # 准备消息
+        messages = [
+            {
+                "role": "system",
+                "content": self.SUMMARY_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": summary_prompt
+            }
+        ]
+        
+        # 调用AI生成总结
+        response = self.ai_request_handler.handle_request(
+            messages=messages,
+            model="gpt-3.5-turbo",
+            temperature=0.3,
+            max_tokens=500
+        )
+        
+        if response.get("success") and response.get("choices"):
+            summary = response["choices"][0]["message"]["content"].strip()
+            with _summary_cache_lock:
+                _summary_cache[cache_key] = (time.monotonic(), summary)
+                _summary_cache.move_to_end(cache_key)
+                if len(_summary_cache) > _SUMMARY_CACHE_SIZE:
+                    _summary_cache.popitem(last=False)
+            return summary
+        
+        return None
+    
     def _build_summary_prompt(self, tool_results: List[Dict[str, Any]]) -> str:
         """
         构建总结提示
         
+        固定说明在前、工具结果在后，相同输入总是生成逐字节相同的文本。
+        
         Args:
             tool_results: 工具执行结果列表
             
         Returns:
             总结提示文本
         """
-        prompt_parts = ["请总结以下工具执行结果：\n"]
+        prompt_parts = [self.SUMMARY_PROMPT_HEADER]
         
         for i, tool_result in enumerate(tool_results, 1):
             tool_name = tool_result.get("name", "未知工具")
             is_error = tool_result.get("is_error", False)
             content = tool_result.get("content", "")
             
-            if is_error:
-                prompt_parts.append(f"{i}. 工具 {tool_name} 执行失败：{content}")
-            else:
-                # 限制内容长度以避免提示过长
-                if len(str(content)) > 1000:
-                    content = str(content)[:1000] + "..."
-                prompt_parts.append(f"{i}. 工具 {tool_name} 执行成功：{content}")
-        
-        prompt_parts.append("\n请提供一个简洁的总结，说明这些工具执行的主要结果和意义。")
+            # 只做一次字符串化：字符串直接使用，字典/列表按键排序紧凑序列化，保证相同内容得到相同文本
+            if not isinstance(content, str):
+                if isinstance(content, (dict, list)):
+                    content = _dumps(content, sort_keys=True)
+                else:
+                    content = str(content)
+            
+            # 成功与失败结果都限制长度，避免超长输出撑大提示
+            if len(content) > self.SUMMARY_CONTENT_LIMIT:
+                content = content[:self.SUMMARY_CONTENT_LIMIT] + "..."
+            
+            status = "执行失败" if is_error else "执行成功"
+            prompt_parts.append(f"{i}. 工具 {tool_name} {status}：{content}")
         
         return "\n".join(prompt_parts)
     
@@ -203,18 +324,22 @@ class ToolResultProcessor:
         Returns:
             统计信息字典
         """
-        total_count = len(tool_results)
-        success_count = sum(1 for result in tool_results if not result.get("is_error", False))
-        error_count = total_count - success_count
+        # 单次遍历同时统计错误数与各工具调用次数
+        tool_usage = Counter()
+        error_count = 0
+        for result in tool_results:
+            tool_usage[result.get("name", "未知工具")] += 1
+            if result.get("is_error", False):
+                error_count += 1
         
-        tool_names = [result.get("name", "未知工具") for result in tool_results]
-        unique_tools = list(set(tool_names))
+        total_count = len(tool_results)
+        success_count = total_count - error_count
         
         return {
             "total_count": total_count,
             "success_count": success_count,
             "error_count": error_count,
             "success_rate": success_count / total_count if total_count > 0 else 0,
-            "unique_tools": unique_tools,
-            "tool_usage": {tool: tool_names.count(tool) for tool in unique_tools}
+            "unique_tools": list(tool_usage),
+            "tool_usage": dict(tool_usage)
         }
\ No newline at end of file
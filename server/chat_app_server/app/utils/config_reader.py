@@ -3,18 +3,22 @@
 """
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+# 项目根目录（当前文件的上上级目录），进程内不变，模块加载时计算一次
+_PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+
+@lru_cache(maxsize=1)
 def get_config_dir() -> str:
     """
-    从配置文件读取 config_dir 路径
+    从配置文件读取 config_dir 路径（结果按进程缓存，修改配置后需调用 get_config_dir.cache_clear()）
     
     Returns:
         配置目录路径
     """
-    # 获取项目根目录（当前文件的上上级目录）
-    project_root = Path(__file__).parent.parent.parent.absolute()
+    project_root = _PROJECT_ROOT
     config_file = project_root / "config.json"
     
     try:
@@ -42,4 +46,4 @@ def get_project_root() -> str:
     Returns:
         项目根目录路径
     """
-    return str(Path(__file__).parent.parent.parent.absolute())
\ No newline at end of file
+    return str(_PROJECT_ROOT)
\ No newline at end of file